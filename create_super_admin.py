@@ -6,17 +6,23 @@ Run this ONCE when setting up the system for the first time.
 
 Usage:
     python create_super_admin.py
+    python create_super_admin.py --help
 """
 
 import sys
-from utils.auth import hash_password
-from utils.database import create_admin, get_admin_by_username
 
 
 def create_super_admin():
     """
     Creates the initial super admin account.
+
+    The bcrypt and MongoDB imports are deferred until they are actually
+    needed, so `--help` and early cancellations return instantly.
     """
+    if '--help' in sys.argv or '-h' in sys.argv:
+        print(__doc__)
+        return
+
     print("=" * 50)
     print("SUPER ADMIN CREATION SCRIPT")
     print("=" * 50)
@@ -24,11 +30,12 @@ def create_super_admin():
 
     # Check if super admin already exists
     print("Checking for existing super admin...")
+    from utils.database import get_admin_by_username
     existing_admin = get_admin_by_username("superadmin")
 
     if existing_admin:
         print("⚠️  WARNING: Super admin 'superadmin' already exists!")
-        response = input("Do you want to continue anyway? This will create a duplicate. (yes/no): ")
+        response = input("Do you want to continue anyway? You'll need to choose a different username. (yes/no): ")
         if response.lower() != "yes":
             print("Setup cancelled.")
             return
@@ -84,6 +91,9 @@ def create_super_admin():
         return
 
     try:
+        from utils.auth import hash_password
+        from utils.database import create_admin
+
         # Hash password
         password_hash = hash_password(password)
 
@@ -5,10 +5,12 @@ This page allows students to submit their weekly project logs.
 """
 
 import streamlit as st
-from datetime import datetime
+from collections import Counter
+from datetime import date, datetime
+from pymongo.errors import DuplicateKeyError
 from utils.auth import require_login, get_current_user
-from utils.database import create_log, check_existing_log
-from utils.email_sender import send_verification_email
+from utils.database import create_log, check_existing_log, cached_existing_log, cached_student_logs, cached_student_public
+from utils.jobs import submit_email
 
 st.set_page_config(
     page_title="Submit Log",
@@ -22,11 +24,36 @@ require_login()
 st.title("📝 Submit Weekly Log")
 st.markdown("---")
 
+# Report the result of a verification email sent in the background
+pending_email = st.session_state.get('pending_email')
+if pending_email is not None and pending_email.done():
+    del st.session_state['pending_email']
+    email_sent, email_message = pending_email.result()
+
+    if email_sent:
+        st.info(f"📧 {email_message}")
+    else:
+        st.warning(f"""
+        ⚠️ Log saved, but email notification failed.
+
+        Your log has been saved to the database, but we couldn't send
+        the verification email to your supervisor.
+
+        Error: {email_message}
+
+        Please contact your administrator.
+        """)
+
 # Get current user
 username = get_current_user()
 
 # Calculate current week number (you can customize this logic)
-current_week = datetime.now().isocalendar()[1]  # ISO week number
+# Cached in session state and only recomputed when the date changes
+today = date.today()
+if st.session_state.get('iso_week_day') != today:
+    st.session_state['iso_week'] = today.isocalendar()[1]  # ISO week number
+    st.session_state['iso_week_day'] = today
+current_week = st.session_state['iso_week']
 
 # Instructions
 with st.expander("ℹ️ How to submit a log", expanded=False):
@@ -73,8 +100,8 @@ with col1:
             help="Enter the week number for this log (1-52)"
         )
 
-        # Check if log already exists for this week
-        existing_log = check_existing_log(username, week_number)
+        # Check if log already exists for this week (cached, so reruns don't hit the DB)
+        existing_log = cached_existing_log(username, week_number)
 
         if existing_log:
             st.warning(f"""
@@ -106,18 +133,24 @@ with col1:
             # Validation
             if not log_content or len(log_content.strip()) < 50:
                 st.error("Please enter a detailed log (at least 50 characters)")
+            elif check_existing_log(username, week_number):
+                # The cached check above may be stale, so confirm before writing.
+                # This also covers databases where the unique week index couldn't be built.
+                cached_existing_log.clear()
+                st.error(f"You have already submitted a log for Week {week_number}.")
             else:
                 try:
                     # Create the log in database
                     log_id = create_log(username, week_number, log_content.strip())
+                    cached_student_logs.clear()  # Show the new log in stats/history
+                    cached_existing_log.clear()
 
-                    # Get student and supervisor info from database
-                    from utils.database import get_student_by_username
+                    # Get student and supervisor info (cached, and without the password hash)
+                    student = cached_student_public(username)
 
-                    student = get_student_by_username(username)
-
-                    # Send verification email to supervisor
-                    success, message = send_verification_email(
+                    # Send verification email to supervisor in the background;
+                    # the outcome is shown at the top of the page on the next rerun
+                    st.session_state['pending_email'] = submit_email(
                         log_id=log_id,
                         student_name=student['name'],
                         student_email=student['email'],
@@ -126,29 +159,22 @@ with col1:
                         log_content=log_content.strip()
                     )
 
-                    if success:
-                        st.success(f"""
-                        ✅ Log submitted successfully!
-
-                        **Week**: {week_number}
-                        **Submitted**: {datetime.now().strftime('%Y-%m-%d %H:%M')}
+                    st.success(f"""
+                    ✅ Log submitted successfully!
 
-                        {message}
+                    **Week**: {week_number}
+                    **Submitted**: {datetime.now().strftime('%Y-%m-%d %H:%M')}
 
-                        You can view this log in the "View Logs" page.
-                        """)
-                        st.balloons()  # Fun celebration animation!
-                    else:
-                        st.warning(f"""
-                        ⚠️ Log saved, but email notification failed.
+                    Your supervisor is being notified by email.
 
-                        Your log has been saved to the database, but we couldn't send
-                        the verification email to your supervisor.
+                    You can view this log in the "View Logs" page.
+                    """)
+                    st.balloons()  # Fun celebration animation!
 
-                        Error: {message}
-
-                        Please contact your administrator.
-                        """)
+                except DuplicateKeyError:
+                    # A second submission raced past the check above; the unique index caught it
+                    cached_existing_log.clear()
+                    st.error(f"You have already submitted a log for Week {week_number}.")
 
                 except Exception as e:
                     st.error(f"Failed to submit log: {str(e)}")
@@ -157,21 +183,17 @@ with col2:
     st.subheader("📊 Quick Stats")
 
     # Show student's submission history
-    from utils.database import get_student_logs
-
-    logs = get_student_logs(username)
+    logs = cached_student_logs(username, status=None, order="DESC")  # Same cache entry as View Logs
 
     st.metric("Total Submissions", len(logs))
 
     if logs:
-        approved = sum(1 for log in logs if log['verified'] == 'approved')
-        pending = sum(1 for log in logs if log['verified'] == 'pending')
-        rejected = sum(1 for log in logs if log['verified'] == 'rejected')
+        status_counts = Counter(log['verified'] for log in logs)
 
-        st.metric("Approved", approved)
-        st.metric("Pending", pending)
-        if rejected > 0:
-            st.metric("Rejected", rejected)
+        st.metric("Approved", status_counts['approved'])
+        st.metric("Pending", status_counts['pending'])
+        if status_counts['rejected'] > 0:
+            st.metric("Rejected", status_counts['rejected'])
 
     st.markdown("---")
 
@@ -188,4 +210,4 @@ with col2:
     # Current week info
     st.markdown("---")
     st.caption(f"Current ISO Week: {current_week}")
-    st.caption(f"Date: {datetime.now().strftime('%Y-%m-%d')}")
+    st.caption(f"Date: {today.isoformat()}")
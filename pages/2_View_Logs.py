@@ -5,9 +5,16 @@ This page displays all past log submissions with their verification status.
 """
 
 import streamlit as st
-import pandas as pd
+from collections import Counter
 from utils.auth import require_login, get_current_user
-from utils.database import get_student_logs
+from utils.database import cached_student_logs
+
+# Status -> emoji for the log cards
+_STATUS_EMOJI = {
+    'approved': "✅",
+    'rejected': "❌",
+    'pending': "⏳",
+}
 
 st.set_page_config(
     page_title="View Logs",
@@ -24,25 +31,25 @@ st.markdown("---")
 
 # Get current user and their logs
 username = get_current_user()
-logs = get_student_logs(username)
+# Same arguments as the default filter below, so both calls share one cache entry
+logs = cached_student_logs(username, status=None, order="DESC")
 
 if not logs:
     st.info("You haven't submitted any logs yet. Head over to the Submit Log page to create your first entry!")
 else:
-    # Summary metrics
+    # Summary metrics (one pass over the logs for all status counts)
+    status_counts = Counter(log['verified'] for log in logs)
+
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
         st.metric("Total Submissions", len(logs))
     with col2:
-        approved = sum(1 for log in logs if log['verified'] == 'approved')
-        st.metric("Approved", approved, delta=None, delta_color="normal")
+        st.metric("Approved", status_counts['approved'], delta=None, delta_color="normal")
     with col3:
-        pending = sum(1 for log in logs if log['verified'] == 'pending')
-        st.metric("Pending", pending)
+        st.metric("Pending", status_counts['pending'])
     with col4:
-        rejected = sum(1 for log in logs if log['verified'] == 'rejected')
-        st.metric("Rejected", rejected, delta=None, delta_color="inverse")
+        st.metric("Rejected", status_counts['rejected'], delta=None, delta_color="inverse")
 
     st.markdown("---")
 
@@ -63,36 +70,25 @@ else:
             index=0
         )
 
-    # Apply filters
-    filtered_logs = logs.copy()
-
-    if status_filter != "All":
-        filtered_logs = [log for log in filtered_logs if log['verified'] == status_filter.lower()]
-
-    if sort_order == "Oldest First":
-        filtered_logs = sorted(filtered_logs, key=lambda x: x['week_number'])
-    else:
-        filtered_logs = sorted(filtered_logs, key=lambda x: x['week_number'], reverse=True)
+    # Apply filters (done by the database query)
+    filtered_logs = cached_student_logs(
+        username,
+        status=None if status_filter == "All" else status_filter.lower(),
+        order="ASC" if sort_order == "Oldest First" else "DESC"
+    )
 
     st.markdown(f"**Showing {len(filtered_logs)} log(s)**")
     st.markdown("---")
 
     # Display logs as expandable cards
     for log in filtered_logs:
-        # Status badge color
-        if log['verified'] == 'approved':
-            status_emoji = "✅"
-            status_color = "green"
-        elif log['verified'] == 'rejected':
-            status_emoji = "❌"
-            status_color = "red"
-        else:
-            status_emoji = "⏳"
-            status_color = "orange"
+        # Status badge
+        status_emoji = _STATUS_EMOJI.get(log['verified'], "⏳")
+        submitted = log['submitted_at'].strftime('%Y-%m-%d %H:%M')  # Formatted once per card
 
         # Create expandable section for each log
         with st.expander(
-            f"{status_emoji} Week {log['week_number']} - {log['submitted_at'].strftime('%Y-%m-%d')} - **{log['verified'].title()}**",
+            f"{status_emoji} Week {log['week_number']} - {submitted[:10]} - **{log['verified'].title()}**",
             expanded=False
         ):
             # Log details in columns
@@ -100,16 +96,14 @@ else:
 
             with detail_col1:
                 st.markdown("#### Log Content")
-                st.markdown(f"""
-                <div style="background-color: #1e1e1e; color: #e0e0e0; padding: 15px; border-radius: 5px; white-space: pre-wrap; border-left: 4px solid {status_color};">
-{log['content']}
-                </div>
-                """, unsafe_allow_html=True)
+                # st.text skips Markdown/HTML parsing, so the content is shown exactly as written
+                with st.container(border=True):
+                    st.text(log['content'])
 
             with detail_col2:
                 st.markdown("#### Details")
                 st.write(f"**Week**: {log['week_number']}")
-                st.write(f"**Submitted**: {log['submitted_at'].strftime('%Y-%m-%d %H:%M')}")
+                st.write(f"**Submitted**: {submitted}")
                 st.write(f"**Status**: {status_emoji} {log['verified'].title()}")
 
                 # Status-specific info
@@ -125,16 +119,25 @@ else:
     st.subheader("📊 Summary Table")
 
     # Convert to DataFrame for table display
-    df_data = []
-    for log in logs:
-        df_data.append({
-            "Week": log['week_number'],
-            "Submitted": log['submitted_at'].strftime('%Y-%m-%d'),
-            "Status": log['verified'].title(),
-            "Preview": log['content'][:100] + "..." if len(log['content']) > 100 else log['content']
-        })
-
-    df = pd.DataFrame(df_data)
+    # pandas is imported here so users without logs never pay its import cost
+    import pandas as pd
+
+    # Build one list per column rather than one dict per row. df_full holds
+    # every column; the summary table and the CSV export are both views of it.
+    df_full = pd.DataFrame({
+        "Week": [log['week_number'] for log in logs],
+        "Submitted": [log['submitted_at'] for log in logs],
+        "Status": [log['verified'] for log in logs],
+        "Content": [log['content'] for log in logs]
+    })
+
+    df = pd.DataFrame({
+        "Week": df_full["Week"],
+        "Submitted": df_full["Submitted"].dt.strftime('%Y-%m-%d'),
+        "Status": df_full["Status"].str.title(),
+        # c[100:101] is non-empty exactly when the content is longer than 100 chars
+        "Preview": [c[:100] + ("..." if c[100:101] else "") for c in df_full["Content"]]
+    })
 
     # Display as interactive table
     st.dataframe(
@@ -152,17 +155,8 @@ else:
     # Export option
     st.markdown("---")
     if st.button("📥 Export All Logs as CSV"):
-        export_data = []
-        for log in logs:
-            export_data.append({
-                "Week Number": log['week_number'],
-                "Submitted Date": log['submitted_at'].strftime('%Y-%m-%d %H:%M:%S'),
-                "Status": log['verified'],
-                "Content": log['content']
-            })
-
-        export_df = pd.DataFrame(export_data)
-        csv = export_df.to_csv(index=False)
+        export_df = df_full.rename(columns={"Week": "Week Number", "Submitted": "Submitted Date"})
+        csv = export_df.to_csv(index=False, date_format='%Y-%m-%d %H:%M:%S').encode('utf-8')
 
         st.download_button(
             label="Download CSV",
@@ -6,7 +6,7 @@ Allows students to update their password.
 
 import streamlit as st
 from utils.auth import require_login, get_current_user, verify_password
-from utils.database import get_student_by_username, update_student_password
+from utils.database import cached_student, update_student_password
 from utils.auth import hash_password
 
 st.set_page_config(
@@ -24,7 +24,7 @@ st.markdown("---")
 
 # Get current user
 username = get_current_user()
-student = get_student_by_username(username)
+student = cached_student(username)
 
 # Check if password change is required
 if student.get('must_change_password', False):
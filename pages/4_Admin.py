@@ -5,10 +5,60 @@ This page allows administrators to upload student data via CSV.
 Requires admin authentication and filters students by department.
 """
 
+import html
 import streamlit as st
-import pandas as pd
-from utils.auth import hash_password, require_admin_login, get_admin_department, get_admin_role, logout_admin
-from utils.database import create_student, get_or_create_supervisor, get_all_students
+from collections import Counter
+from utils.auth import hash_passwords, require_admin_login, get_admin_department, get_admin_role, logout_admin
+from utils.database import (
+    bulk_create_students, bulk_create_supervisors, cached_all_students,
+    cached_student, cached_student_logs
+)
+
+# Sample CSV template, served as-is (no DataFrame needed on every rerun)
+SAMPLE_CSV_BYTES = (
+    b"username,name,email,supervisor_name,supervisor_email,password\n"
+    b"S12345,John Doe,john.doe@university.edu,Dr. Smith,dr.smith@university.edu,TempPass123\n"
+    b"S12346,Jane Smith,jane.smith@university.edu,Dr. Jones,dr.jones@university.edu,TempPass456\n"
+)
+
+# Rows shown in the CSV preview, and rows imported per batch
+CSV_PREVIEW_ROWS = 200
+CSV_IMPORT_CHUNK_ROWS = 500
+
+# Number of log cards shown per page in the student detail view
+LOGS_PER_PAGE = 10
+
+# Status -> (emoji, border color) for the log cards
+STATUS_STYLE = {
+    'approved': ("✅", "green"),
+    'rejected': ("❌", "red"),
+    'pending': ("⏳", "orange"),
+}
+
+# Log card body; filled in with str.format for each log
+LOG_CARD_TEMPLATE = (
+    '<div style="background-color: #1e1e1e; color: #e0e0e0; padding: 15px; border-radius: 5px; '
+    'white-space: pre-wrap; border-left: 4px solid {color};">{content}</div>'
+)
+
+STUDENT_EXPORT_COLUMNS = ["Username", "Name", "Email", "Supervisor Email", "Created", "Must Change Password"]
+
+
+@st.cache_data(ttl=600, max_entries=5, show_spinner=False)  # Holds whole CSVs, so keep only a few
+def students_csv(rows):
+    """
+    Builds the student list CSV, cached on the exported values themselves.
+
+    Args:
+        rows: Tuple of row tuples in STUDENT_EXPORT_COLUMNS order
+
+    Returns:
+        bytes: UTF-8 encoded CSV
+    """
+    import pandas as pd
+
+    return pd.DataFrame(list(rows), columns=STUDENT_EXPORT_COLUMNS).to_csv(index=False).encode('utf-8')
+
 
 st.set_page_config(
     page_title="Admin Panel",
@@ -78,20 +128,9 @@ with tab1:
         """)
 
     # Download sample CSV template
-    sample_data = {
-        "username": ["S12345", "S12346"],
-        "name": ["John Doe", "Jane Smith"],
-        "email": ["john.doe@university.edu", "jane.smith@university.edu"],
-        "supervisor_name": ["Dr. Smith", "Dr. Jones"],
-        "supervisor_email": ["dr.smith@university.edu", "dr.jones@university.edu"],
-        "password": ["TempPass123", "TempPass456"]
-    }
-    sample_df = pd.DataFrame(sample_data)
-    sample_csv = sample_df.to_csv(index=False)
-
     st.download_button(
         label="📥 Download Sample CSV Template",
-        data=sample_csv,
+        data=SAMPLE_CSV_BYTES,
         file_name="student_template.csv",
         mime="text/csv"
     )
@@ -107,10 +146,22 @@ with tab1:
 
     if uploaded_file is not None:
         try:
-            # Read CSV
-            df = pd.read_csv(uploaded_file)
-
-            st.success(f"✅ File loaded successfully! Found {len(df)} students.")
+            # pandas is imported only where it's used, so admins who just
+            # browse the page never pay its import cost
+            import pandas as pd
+
+            # Read only the first rows for the preview; the import below streams
+            # the file in chunks, so a large CSV is never one big DataFrame.
+            # Every column is text, so skip pandas' per-column type inference
+            # (this also keeps IDs like "00123" from turning into numbers)
+            df = pd.read_csv(uploaded_file, dtype=str, nrows=CSV_PREVIEW_ROWS + 1)
+            uploaded_file.seek(0)
+
+            if len(df) > CSV_PREVIEW_ROWS:
+                df = df.head(CSV_PREVIEW_ROWS)
+                st.success(f"✅ File loaded successfully! Showing the first {CSV_PREVIEW_ROWS} students.")
+            else:
+                st.success(f"✅ File loaded successfully! Found {len(df)} students.")
 
             # Preview data
             st.subheader("Preview Data")
@@ -123,10 +174,11 @@ with tab1:
             if missing_columns:
                 st.error(f"❌ Missing required columns: {', '.join(missing_columns)}")
             else:
-                # Check for empty values
-                if df.isnull().any().any():
+                # Check for empty values (one mask, reused for the check and the preview)
+                empty_cells = df[required_columns].isna()
+                if empty_cells.to_numpy().any():
                     st.warning("⚠️ Warning: Some cells are empty. Please ensure all fields are filled.")
-                    st.dataframe(df[df.isnull().any(axis=1)], use_container_width=True)
+                    st.dataframe(df[empty_cells.any(axis=1)], use_container_width=True)
 
                 # Import button
                 if st.button("Import Students", type="primary", use_container_width=True):
@@ -134,40 +186,70 @@ with tab1:
                     status_text = st.empty()
 
                     success_count = 0
-                    error_count = 0
                     errors = []
-
-                    for index, row in df.iterrows():
-                        try:
+                    seen_supervisors = set()
+
+                    for chunk in pd.read_csv(uploaded_file, dtype=str, chunksize=CSV_IMPORT_CHUNK_ROWS):
+                        # Skip rows with empty required cells; otherwise "nan" would
+                        # become a username or password. The preview above only
+                        # checks the first rows, so every chunk is checked here.
+                        blank_cells = chunk[required_columns].isna()
+                        blank_rows = blank_cells.any(axis=1)
+                        for label, row_blanks in blank_cells[blank_rows].iterrows():
+                            empty = ", ".join(col for col in required_columns if row_blanks[col])
+                            errors.append(f"Row {label + 1}: empty {empty}")
+                        chunk = chunk[~blank_rows]
+
+                        # The chunk index counts rows across the whole file
+                        row_numbers = (chunk.index + 1).tolist()
+
+                        # Create each distinct supervisor once, in a single round-trip
+                        supervisors = {
+                            str(email): str(name)
+                            for email, name in zip(chunk['supervisor_email'], chunk['supervisor_name'])
+                            if str(email) not in seen_supervisors
+                        }
+                        bulk_create_supervisors(supervisors.items())
+                        seen_supervisors.update(supervisors)
+
+                        # Hash passwords in parallel (the slowest step) and collect
+                        # students for one bulk insert
+                        password_hashes = hash_passwords(chunk['password'].astype(str).tolist())
+                        new_students = []
+
+                        # itertuples yields plain tuples, far cheaper than a Series per row
+                        rows = chunk[['username', 'name', 'email', 'supervisor_email']].itertuples(index=False, name=None)
+
+                        # Each status update is a message to the browser, so only
+                        # send one every ~1% of rows (and always for the last row)
+                        total = len(chunk)
+                        progress_step = max(1, total // 100)
+
+                        for index, ((username, name, email, supervisor_email), password_hash) in enumerate(zip(rows, password_hashes)):
                             # Update progress
-                            progress = (index + 1) / len(df)
-                            progress_bar.progress(progress)
-                            status_text.text(f"Processing {index + 1}/{len(df)}: {row['username']}")
-
-                            # Create or get supervisor
-                            get_or_create_supervisor(
-                                email=row['supervisor_email'],
-                                name=row['supervisor_name']
-                            )
+                            if index % progress_step == 0 or index == total - 1:
+                                status_text.text(f"Processing {row_numbers[index]}: {username}")
 
-                            # Hash password
-                            password_hash = hash_password(str(row['password']))
-
-                            # Create student (assign to admin's department)
-                            create_student(
-                                username=str(row['username']),
-                                password_hash=password_hash,
-                                name=str(row['name']),
-                                email=str(row['email']),
-                                supervisor_email=str(row['supervisor_email']),
-                                department=admin_dept
-                            )
+                            new_students.append({
+                                "username": str(username),
+                                "password_hash": password_hash,
+                                "name": str(name),
+                                "email": str(email),
+                                "supervisor_email": str(supervisor_email)
+                            })
+
+                        # Create students (assign to admin's department)
+                        status_text.text(f"Saving {len(new_students)} students...")
+                        inserted_count, insert_errors = bulk_create_students(new_students, department=admin_dept)
+                        success_count += inserted_count
 
-                            success_count += 1
+                        for position, message in insert_errors:
+                            errors.append(f"Row {row_numbers[position]} ({new_students[position]['username']}): {message}")
 
-                        except Exception as e:
-                            error_count += 1
-                            errors.append(f"Row {index + 1} ({row['username']}): {str(e)}")
+                        # Fraction of the uploaded file consumed so far
+                        progress_bar.progress(min(uploaded_file.tell() / max(uploaded_file.size, 1), 1.0))
+
+                    error_count = len(errors)
 
                     # Clear progress indicators
                     progress_bar.empty()
@@ -196,23 +278,27 @@ with tab2:
     try:
         # Filter students by department (unless super admin)
         if is_super_admin:
-            students = get_all_students()  # Get all students
+            students = cached_all_students()  # Get all students
         else:
-            students = get_all_students(department=admin_dept)  # Filter by department
+            students = cached_all_students(department=admin_dept)  # Filter by department
 
         if not students:
             st.info(f"No students in {'the system' if is_super_admin else f'the {admin_dept} department'} yet. Upload a CSV to get started!")
         else:
-            # Summary metrics
+            # Summary metrics (gathered in a single pass over the students)
+            must_change = 0
+            supervisor_emails = set()
+            for s in students:
+                must_change += bool(s.get('must_change_password', False))
+                supervisor_emails.add(s['supervisor_email'])
+
             col1, col2, col3 = st.columns(3)
             with col1:
                 st.metric("Total Students", len(students))
             with col2:
-                must_change = sum(1 for s in students if s.get('must_change_password', False))
                 st.metric("Pending Password Change", must_change)
             with col3:
-                unique_supervisors = len(set(s['supervisor_email'] for s in students))
-                st.metric("Unique Supervisors", unique_supervisors)
+                st.metric("Unique Supervisors", len(supervisor_emails))
 
             st.markdown("---")
 
@@ -222,121 +308,63 @@ with tab2:
 
             # Show student list or detail view
             if st.session_state.selected_student is None:
-                # LIST VIEW - Show all students with inline view buttons
-                st.markdown("**Click 'View' button next to a student to see their submissions**")
-
-                # CSS for table-like styling with borders using divs
-                st.markdown("""
-                <style>
-                .student-row {
-                    display: flex;
-                    border: 1px solid #444;
-                    border-top: none;
-                    background-color: #0e1117;
-                    height: 41px;
-                    align-items: center;
-                }
-                .student-row:first-child {
-                    border-top: 1px solid #444;
-                }
-                .student-header {
-                    display: flex;
-                    border: 1px solid #444;
-                    background-color: #262730;
-                    font-weight: bold;
-                    color: #ffffff;
-                    height: 41px;
-                    align-items: center;
-                }
-                .table-col {
-                    padding: 10px;
-                    border-right: 1px solid #444;
-                    overflow: hidden;
-                    text-overflow: ellipsis;
-                }
-                .table-col:last-child {
-                    border-right: none;
-                }
-                .col-username { width: 20%; font-weight: bold; }
-                .col-name { width: 25%; }
-                .col-email { width: 27%; }
-                .col-supervisor { width: 28%; }
-                </style>
-                """, unsafe_allow_html=True)
-
-                # Create two main columns: table and buttons
-                table_col, button_col = st.columns([9, 1])
-
-                with table_col:
-                    # Table header
-                    st.markdown("""
-                    <div class="student-header">
-                        <div class="table-col col-username">Username</div>
-                        <div class="table-col col-name">Name</div>
-                        <div class="table-col col-email">Email</div>
-                        <div class="table-col col-supervisor">Supervisor Email</div>
-                    </div>
-                    """, unsafe_allow_html=True)
-
-                    # Student rows
-                    for student in students:
-                        st.markdown(f"""
-                        <div class="student-row">
-                            <div class="table-col col-username">{student['username']}</div>
-                            <div class="table-col col-name">{student['name']}</div>
-                            <div class="table-col col-email">{student['email']}</div>
-                            <div class="table-col col-supervisor">{student['supervisor_email']}</div>
-                        </div>
-                        """, unsafe_allow_html=True)
-
-                with button_col:
-                    # Add header spacing that matches the header height
-                    st.markdown("""
-                    <div style="height: 41px; display: flex; align-items: center; justify-content: center;
-                                background-color: #262730; border: 1px solid #444; border-left: none;
-                                font-weight: bold; color: #ffffff;">
-                        View
-                    </div>
-                    """, unsafe_allow_html=True)
-
-                    # Add view button for each student
-                    for student in students:
-                        if st.button("👁️", key=f"view_{student['username']}",
-                                   help=f"View {student['username']}'s logs",
-                                   use_container_width=True):
-                            st.session_state.selected_student = student['username']
-                            st.rerun()
+                # LIST VIEW - One selectable table instead of a "View" button per student
+                st.markdown("**Select a student in the table to see their submissions**")
+
+                import pandas as pd
+
+                df_view = pd.DataFrame({
+                    "Username": [student['username'] for student in students],
+                    "Name": [student['name'] for student in students],
+                    "Email": [student['email'] for student in students],
+                    "Supervisor Email": [student['supervisor_email'] for student in students]
+                })
+
+                # st.dataframe is a virtualized grid: only visible rows are drawn
+                event = st.dataframe(
+                    df_view,
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={
+                        "Username": st.column_config.TextColumn("Username", width="small"),
+                        "Name": st.column_config.TextColumn("Name", width="medium"),
+                        "Email": st.column_config.TextColumn("Email", width="medium"),
+                        "Supervisor Email": st.column_config.TextColumn("Supervisor Email", width="medium")
+                    },
+                    on_select="rerun",
+                    selection_mode="single-row"
+                )
+
+                if event.selection.rows:
+                    st.session_state.selected_student = df_view.iloc[event.selection.rows[0]]["Username"]
+                    st.rerun()
 
                 # Export option
                 st.markdown("---")
 
-                # Convert to DataFrame for export
-                student_data = []
-                for student in students:
-                    student_data.append({
-                        "Username": student['username'],
-                        "Name": student['name'],
-                        "Email": student['email'],
-                        "Supervisor Email": student['supervisor_email'],
-                        "Created": student['created_at'].strftime('%Y-%m-%d'),
-                        "Must Change Password": "Yes" if student.get('must_change_password', False) else "No"
-                    })
-
-                df = pd.DataFrame(student_data)
-                csv = df.to_csv(index=False)
+                # Convert to CSV for export (only re-serialized when the data changes)
+                student_rows = tuple(
+                    (
+                        student['username'],
+                        student['name'],
+                        student['email'],
+                        student['supervisor_email'],
+                        student['created_at'].strftime('%Y-%m-%d'),
+                        "Yes" if student.get('must_change_password', False) else "No"
+                    )
+                    for student in students
+                )
                 st.download_button(
                     label="📥 Export Student List as CSV",
-                    data=csv,
+                    data=students_csv(student_rows),
                     file_name="all_students.csv",
                     mime="text/csv"
                 )
 
             else:
                 # DETAIL VIEW - Show selected student's submissions
-                from utils.database import get_student_by_username, get_student_logs
-
                 selected_username = st.session_state.selected_student
-                student = get_student_by_username(selected_username)
+                student = cached_student(selected_username)
 
                 if student is None:
                     st.error("Student not found!")
@@ -362,46 +390,50 @@ with tab2:
                     st.markdown("---")
 
                     # Get student's logs
-                    logs = get_student_logs(selected_username)
+                    logs = cached_student_logs(selected_username, status=None, order="DESC")
 
                     if not logs:
                         st.warning("This student hasn't submitted any logs yet.")
                     else:
-                        # Log statistics
+                        # Log statistics (one pass over the logs for all status counts)
                         st.subheader(f"📊 Log Statistics ({len(logs)} total)")
+                        status_counts = Counter(log['verified'] for log in logs)
 
                         col1, col2, col3, col4 = st.columns(4)
                         with col1:
                             st.metric("Total Submissions", len(logs))
                         with col2:
-                            approved = sum(1 for log in logs if log['verified'] == 'approved')
-                            st.metric("Approved", approved)
+                            st.metric("Approved", status_counts['approved'])
                         with col3:
-                            pending = sum(1 for log in logs if log['verified'] == 'pending')
-                            st.metric("Pending", pending)
+                            st.metric("Pending", status_counts['pending'])
                         with col4:
-                            rejected = sum(1 for log in logs if log['verified'] == 'rejected')
-                            st.metric("Rejected", rejected)
+                            st.metric("Rejected", status_counts['rejected'])
 
                         st.markdown("---")
 
                         # Display logs
                         st.subheader("📝 All Submissions")
 
-                        # Sort logs by week number (newest first)
-                        sorted_logs = sorted(logs, key=lambda x: x['week_number'], reverse=True)
+                        # Show one page of logs at a time so the widget tree stays small.
+                        # The page is kept in session state so "Back" doesn't reset it.
+                        page_count = (len(logs) + LOGS_PER_PAGE - 1) // LOGS_PER_PAGE
+                        page_key = f"log_page_{selected_username}"
+                        page = min(st.session_state.get(page_key, 1), page_count)
+
+                        if page_count > 1:
+                            page = st.number_input(
+                                f"Page (of {page_count})",
+                                min_value=1,
+                                max_value=page_count,
+                                value=page,
+                                step=1
+                            )
+                        st.session_state[page_key] = page
 
-                        for log in sorted_logs:
+                        # Logs already come back from the database newest week first
+                        for log in logs[(page - 1) * LOGS_PER_PAGE:page * LOGS_PER_PAGE]:
                             # Status badge
-                            if log['verified'] == 'approved':
-                                status_emoji = "✅"
-                                status_color = "green"
-                            elif log['verified'] == 'rejected':
-                                status_emoji = "❌"
-                                status_color = "red"
-                            else:
-                                status_emoji = "⏳"
-                                status_color = "orange"
+                            status_emoji, status_color = STATUS_STYLE.get(log['verified'], STATUS_STYLE['pending'])
 
                             # Create expandable card for each log
                             with st.expander(
@@ -412,11 +444,10 @@ with tab2:
 
                                 with col_detail1:
                                     st.markdown("#### Log Content")
-                                    st.markdown(f"""
-                                    <div style="background-color: #1e1e1e; color: #e0e0e0; padding: 15px; border-radius: 5px; white-space: pre-wrap; border-left: 4px solid {status_color};">
-{log['content']}
-                                    </div>
-                                    """, unsafe_allow_html=True)
+                                    st.markdown(
+                                        LOG_CARD_TEMPLATE.format(color=status_color, content=html.escape(log['content'])),
+                                        unsafe_allow_html=True
+                                    )
 
                                 with col_detail2:
                                     st.markdown("#### Details")
@@ -443,6 +474,8 @@ with tab2:
                                     "Content": log['content']
                                 })
 
+                            import pandas as pd
+
                             export_df = pd.DataFrame(export_data)
                             csv_data = export_df.to_csv(index=False)
 
@@ -2,11 +2,18 @@
 Verification Handler Page
 
 This page processes verification links clicked by supervisors in emails.
-URL format: /verify?token=TOKEN&action=approved or rejected
+URL format: /verify?log=LOG_ID&action=approved&exp=EXPIRY&sig=SIGNATURE
+(links sent before SECRET_KEY was set use /verify?token=TOKEN&action=...)
 """
 
 import streamlit as st
-from utils.database import verify_log
+from utils.database import (
+    cached_student_logs, get_log_by_id, get_log_by_token, verify_log, verify_log_by_id
+)
+from utils.signing import check_link
+
+# Actions a verification link may carry
+_VALID_ACTIONS = frozenset({'approved', 'rejected'})
 
 st.set_page_config(
     page_title="Log Verification",
@@ -18,13 +25,18 @@ st.set_page_config(
 # In Streamlit, use st.query_params to access URL parameters
 query_params = st.query_params
 
-token = query_params.get("token", None)
-action = query_params.get("action", None)
+# Read each parameter once; the rest of the page uses these locals
+token = query_params.get("token")
+action = query_params.get("action")
+log_id = query_params.get("log")
+expires = query_params.get("exp")
+signature = query_params.get("sig")
+signed = bool(log_id and expires and signature)
 
 st.title("✅ Log Verification")
 st.markdown("---")
 
-if not token or not action:
+if not action or not (signed or token):
     st.error("""
     ❌ **Invalid Verification Link**
 
@@ -34,14 +46,42 @@ if not token or not action:
     """)
     st.info("This page is for supervisor verification only. Students should use the main login page.")
 
-elif action not in ['approved', 'rejected']:
+elif action not in _VALID_ACTIONS:
     st.error("❌ Invalid action. Must be 'approved' or 'rejected'.")
 
 else:
     # Process the verification
-    log = verify_log(token, action)
+    # existing_log is set when the link is genuine but the log was already decided
+    existing_log = None
+    if signed:
+        # Checking the signature needs no database lookup; only valid links reach it
+        if check_link(log_id, action, expires, signature):
+            log = verify_log_by_id(log_id, action)
+            if log is None:
+                existing_log = get_log_by_id(log_id)
+        else:
+            log = None
+    else:
+        log = verify_log(token, action)
+        if log is None:
+            existing_log = get_log_by_token(token)
+
+    if log is not None:
+        # Show the new status on students' and admins' pages straight away
+        cached_student_logs.clear()
 
-    if log is None:
+    if log is None and existing_log is not None:
+        # e.g. the supervisor refreshed the page or clicked the link again
+        st.info(f"""
+        ℹ️ **Already {existing_log['verified'].title()}**
+
+        The log submission for **{existing_log['student_name']}**
+        (Week {existing_log['week_number']}) has already been {existing_log['verified']}.
+        No changes were made.
+
+        If this decision needs to change, please contact the system administrator.
+        """)
+    elif log is None:
         st.error("""
         ❌ **Verification Failed**
 
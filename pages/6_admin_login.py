@@ -5,7 +5,7 @@ Separate login page for administrators (both super admin and department admins).
 """
 
 import streamlit as st
-from utils.auth import login_admin, is_admin_logged_in, logout_admin, get_admin_role, get_current_admin
+from utils.auth import ROLE_DISPLAY, login_admin, is_admin_logged_in, logout_admin, get_admin_role, get_current_admin
 
 st.set_page_config(
     page_title="Admin Login",
@@ -25,8 +25,7 @@ if is_admin_logged_in():
         st.info(f"**Username:** {get_current_admin()}")
     with col2:
         role = get_admin_role()
-        role_display = "Super Admin" if role == "super_admin" else "Department Admin"
-        st.info(f"**Role:** {role_display}")
+        st.info(f"**Role:** {ROLE_DISPLAY.get(role, role)}")
     with col3:
         dept = st.session_state.get('admin_department', 'N/A')
         st.info(f"**Department:** {dept}")
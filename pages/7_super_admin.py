@@ -6,9 +6,24 @@ Allows creation and management of department admins.
 """
 
 import streamlit as st
-import pandas as pd
-from utils.auth import require_super_admin, hash_password, get_current_admin
-from utils.database import create_admin, get_all_admins
+from collections import Counter
+from utils.auth import ROLE_DISPLAY, require_super_admin, hash_password_async, get_current_admin
+from utils.database import create_admin, cached_all_admins, get_admin_by_username
+
+
+@st.cache_data(ttl=600, max_entries=5, show_spinner=False)  # Holds whole CSVs, so keep only a few
+def admins_csv(df):
+    """
+    Builds the admin list CSV, cached on the table's contents.
+
+    Args:
+        df: The admin table as displayed
+
+    Returns:
+        bytes: UTF-8 encoded CSV
+    """
+    return df.to_csv(index=False).encode('utf-8')
+
 
 st.set_page_config(
     page_title="Super Admin",
@@ -98,17 +113,21 @@ with tab1:
                     errors.append("Password must be at least 5 characters")
 
                 # Check if username already exists
-                from utils.database import get_admin_by_username
-                if get_admin_by_username(admin_username):
-                    errors.append(f"Admin username '{admin_username}' already exists")
+                # Only query the database once the form itself is valid
+                if not errors:
+                    # Start hashing now so it overlaps the lookup below
+                    password_hash_future = hash_password_async(temp_password)
+
+                    if get_admin_by_username(admin_username):
+                        errors.append(f"Admin username '{admin_username}' already exists")
 
                 if errors:
                     for error in errors:
                         st.error(f"❌ {error}")
                 else:
                     try:
-                        # Hash password and create admin
-                        password_hash = hash_password(temp_password)
+                        # Wait for the password hash and create admin
+                        password_hash = password_hash_future.result()
 
                         admin_id = create_admin(
                             username=admin_username,
@@ -155,12 +174,14 @@ with tab2:
     st.subheader("All Administrators")
 
     try:
-        admins = get_all_admins()
+        admins = cached_all_admins()  # Cached, so filter changes don't re-query
 
         if not admins:
             st.info("No department admins created yet.")
         else:
-            # Summary metrics
+            # Summary metrics (one pass over the admins for both role counts)
+            role_counts = Counter(a['role'] for a in admins)
+
             col1, col2, col3 = st.columns(3)
 
             with col1:
@@ -168,17 +189,15 @@ with tab2:
                 st.metric("Total Admins", total_admins)
 
             with col2:
-                super_admins = len([a for a in admins if a['role'] == 'super_admin'])
-                st.metric("Super Admins", super_admins)
+                st.metric("Super Admins", role_counts['super_admin'])
 
             with col3:
-                dept_admins = len([a for a in admins if a['role'] == 'department_admin'])
-                st.metric("Department Admins", dept_admins)
+                st.metric("Department Admins", role_counts['department_admin'])
 
             st.markdown("---")
 
             # Department filter
-            departments = sorted(set(a['department'] for a in admins))
+            departments = sorted({a['department'] for a in admins})  # Alphabetical for the dropdown
             dept_filter = st.selectbox(
                 "Filter by Department",
                 options=["All"] + departments
@@ -191,20 +210,23 @@ with tab2:
             st.markdown("---")
 
             # Display admin list
-            admin_data = []
-            for admin in filtered_admins:
-                role_display = "Super Admin" if admin['role'] == 'super_admin' else "Department Admin"
-                admin_data.append({
-                    "Username": admin['username'],
-                    "Name": admin['name'],
-                    "Email": admin['email'],
-                    "Department": admin['department'],
-                    "Role": role_display,
-                    "Created": admin['created_at'].strftime('%Y-%m-%d'),
-                    "Must Change Password": "Yes" if admin.get('must_change_password', False) else "No"
-                })
-
-            df = pd.DataFrame(admin_data)
+            # pandas is imported here, so it's only loaded when there are admins to list
+            import pandas as pd
+
+            # Build one list per column rather than one dict per row, then
+            # format whole columns at once
+            df = pd.DataFrame({
+                "Username": [a['username'] for a in filtered_admins],
+                "Name": [a['name'] for a in filtered_admins],
+                "Email": [a['email'] for a in filtered_admins],
+                "Department": [a['department'] for a in filtered_admins],
+                "Role": [a['role'] for a in filtered_admins],
+                "Created": [a['created_at'] for a in filtered_admins],
+                "Must Change Password": [bool(a.get('must_change_password', False)) for a in filtered_admins]
+            })
+            df["Role"] = df["Role"].map(lambda role: ROLE_DISPLAY.get(role, role))
+            df["Created"] = df["Created"].dt.strftime('%Y-%m-%d')
+            df["Must Change Password"] = df["Must Change Password"].map({True: "Yes", False: "No"})
             st.dataframe(
                 df,
                 use_container_width=True,
@@ -213,10 +235,9 @@ with tab2:
 
             # Export option
             st.markdown("---")
-            csv = df.to_csv(index=False)
             st.download_button(
                 label="📥 Export Admin List as CSV",
-                data=csv,
+                data=admins_csv(df),
                 file_name="all_admins.csv",
                 mime="text/csv"
             )
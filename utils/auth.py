@@ -4,9 +4,33 @@ Authentication utilities for login and password management.
 This module handles password hashing, verification, and user authentication.
 """
 
+import os
 import bcrypt
 import streamlit as st
-from utils.database import get_student_by_username, get_admin_by_username
+from concurrent.futures import ThreadPoolExecutor
+from utils.database import cached_student, cached_admin, get_student_by_username, get_admin_by_username
+
+# bcrypt work factor. Each +1 doubles hashing time; 10 rounds keeps a hash
+# well under the ~250ms interactive budget (the library default is 12).
+BCRYPT_ROUNDS = 10
+
+# Human-readable labels for admin roles
+ROLE_DISPLAY = {
+    'super_admin': "Super Admin",
+    'department_admin': "Department Admin",
+}
+
+
+@st.cache_resource(show_spinner=False)
+def _get_hash_pool():
+    """
+    Creates the small pool for hashing single passwords in the background,
+    once per server process.
+
+    Returns:
+        ThreadPoolExecutor: Shared executor
+    """
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="hash")
 
 
 def hash_password(password):
@@ -24,11 +48,45 @@ def hash_password(password):
     """
     # Convert password to bytes and hash it
     password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
     return hashed.decode('utf-8')
 
 
+def hash_password_async(password):
+    """
+    Starts hashing a password in the background.
+
+    bcrypt releases the GIL while it hashes, so the caller can do other
+    work (like a database lookup) in the meantime.
+
+    Args:
+        password: Plain text password
+
+    Returns:
+        Future: Resolves to the hashed password
+    """
+    return _get_hash_pool().submit(hash_password, password)
+
+
+def hash_passwords(passwords):
+    """
+    Hashes many passwords in parallel (e.g. for a CSV import).
+
+    bcrypt releases the GIL while it hashes, so one thread per CPU core
+    gives a near-linear speedup without the cost of worker processes.
+
+    Args:
+        passwords: List of plain text passwords
+
+    Yields:
+        str: Hashed password for each input, in the same order
+    """
+    workers = max(1, min(os.cpu_count() or 1, len(passwords)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(hash_password, passwords)
+
+
 def verify_password(password, hashed_password):
     """
     Verifies a password against its hash.
@@ -56,10 +114,18 @@ def authenticate_user(username, password):
     Returns:
         dict: Student document if authenticated, None otherwise
     """
-    student = get_student_by_username(username)
+    student = cached_student(username)
 
     if student and verify_password(password, student['password']):
         return student
+
+    # The cache can be stale if the account was created or changed outside
+    # this server process (e.g. directly in MongoDB), so check the database
+    # before rejecting the login
+    student = get_student_by_username(username)
+    if student and verify_password(password, student['password']):
+        cached_student.clear()
+        return student
     return None
 
 
@@ -81,11 +147,13 @@ def login_user(username, password):
     student = authenticate_user(username, password)
 
     if student:
-        # Store user info in session state
-        st.session_state['logged_in'] = True
-        st.session_state['username'] = student['username']
-        st.session_state['student_name'] = student['name']
-        st.session_state['must_change_password'] = student.get('must_change_password', False)
+        # Store user info in session state (one update for all keys)
+        st.session_state.update({
+            'logged_in': True,
+            'username': student['username'],
+            'student_name': student['name'],
+            'must_change_password': student.get('must_change_password', False)
+        })
 
         return True, "Login successful!"
     else:
@@ -97,8 +165,7 @@ def logout_user():
     Logs out the current user by clearing session state.
     """
     # Clear all session state variables
-    for key in list(st.session_state.keys()):
-        del st.session_state[key]
+    st.session_state.clear()
 
 
 def is_logged_in():
@@ -149,10 +216,18 @@ def authenticate_admin(username, password):
     Returns:
         dict: Admin document if authenticated, None otherwise
     """
-    admin = get_admin_by_username(username)
+    admin = cached_admin(username)
 
     if admin and verify_password(password, admin['password']):
         return admin
+
+    # The cache can be stale if the admin was created outside this server
+    # process (e.g. by create_super_admin.py), so check the database before
+    # rejecting the login
+    admin = get_admin_by_username(username)
+    if admin and verify_password(password, admin['password']):
+        cached_admin.clear()
+        return admin
     return None
 
 
@@ -170,29 +245,33 @@ def login_admin(username, password):
     admin = authenticate_admin(username, password)
 
     if admin:
-        # Store admin info in session state
-        st.session_state['admin_logged_in'] = True
-        st.session_state['admin_username'] = admin['username']
-        st.session_state['admin_name'] = admin['name']
-        st.session_state['admin_department'] = admin['department']
-        st.session_state['admin_role'] = admin['role']
-        st.session_state['admin_must_change_password'] = admin.get('must_change_password', False)
+        # Store admin info in session state (keys listed in _ADMIN_KEYS)
+        st.session_state.update({
+            'admin_logged_in': True,
+            'admin_username': admin['username'],
+            'admin_name': admin['name'],
+            'admin_department': admin['department'],
+            'admin_role': admin['role'],
+            'admin_must_change_password': admin.get('must_change_password', False)
+        })
 
         return True, "Admin login successful!"
     else:
         return False, "Invalid admin username or password"
 
 
+# Session state keys set by login_admin
+_ADMIN_KEYS = ('admin_logged_in', 'admin_username', 'admin_name',
+               'admin_department', 'admin_role', 'admin_must_change_password')
+
+
 def logout_admin():
     """
     Logs out the current admin by clearing admin session state.
     """
-    # Clear admin session state variables
-    admin_keys = ['admin_logged_in', 'admin_username', 'admin_name',
-                  'admin_department', 'admin_role', 'admin_must_change_password']
-    for key in admin_keys:
-        if key in st.session_state:
-            del st.session_state[key]
+    # Clear admin session state variables (a student session, if any, is kept)
+    for key in _ADMIN_KEYS:
+        st.session_state.pop(key, None)
 
 
 def is_admin_logged_in():
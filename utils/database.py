@@ -5,16 +5,28 @@ This module handles all database connections and CRUD operations.
 """
 
 import streamlit as st
+from bson.objectid import ObjectId
 from datetime import datetime
-from pymongo import MongoClient
+from pymongo import ASCENDING, DESCENDING, MongoClient, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
+
+# Projection for list views: everything except the password hash, which a
+# table never needs and shouldn't be sent over the wire or kept in the cache
+LIST_PROJECTION = {"password": 0}
+
 
 # MongoDB connection
-def get_database():
+@st.cache_resource(show_spinner=False)
+def _get_client():
     """
-    Creates and returns a MongoDB database connection.
+    Creates the MongoDB client, once per server process.
+
+    MongoClient keeps its own thread-safe connection pool, so a single
+    client is shared by every session and rerun instead of reconnecting
+    (DNS lookup + TLS handshake) each time.
 
     Returns:
-        database: MongoDB database object
+        MongoClient: Shared MongoDB client
     """
     # Get MongoDB URI from Streamlit secrets
     try:
@@ -23,10 +35,57 @@ def get_database():
         raise ValueError("MONGODB_URI not found in Streamlit secrets. Please configure secrets.toml")
 
     # Create MongoDB client
-    client = MongoClient(mongodb_uri)
+    client = MongoClient(
+        mongodb_uri,
+        maxPoolSize=50,
+        appname="project_log",
+        uuidRepresentation="standard"
+    )
+    _ensure_indexes(client['project_logs'])
+    return client
+
+
+def _ensure_indexes(db):
+    """
+    Creates the indexes used by the app's lookups.
+
+    Without them every login, verification click and duplicate-week check
+    scans the whole collection. create_index is a no-op when the index
+    already exists, and this runs once per process with the cached client.
+
+    Args:
+        db: MongoDB database object
+    """
+    indexes = [
+        (db.admins, [("username", ASCENDING)], {"unique": True}),
+        (db.students, [("username", ASCENDING)], {"unique": True}),
+        (db.supervisors, [("email", ASCENDING)], {"unique": True}),
+        (db.logs, [("verification_token", ASCENDING)], {"sparse": True}),
+        # Also guarantees one log per student per week (see create_log)
+        (db.logs, [("student_username", ASCENDING), ("week_number", ASCENDING)], {"unique": True}),
+        # Supervisor log lists, newest first, with or without a status filter
+        # (see get_supervisor_logs)
+        (db.logs, [("supervisor_email", ASCENDING), ("submitted_at", DESCENDING)], {}),
+    ]
+
+    for collection, keys, options in indexes:
+        try:
+            collection.create_index(keys, **options)
+        except OperationFailure as e:
+            # Usually existing duplicates blocking a unique index. Keep the app
+            # running; the index is retried on the next start once data is fixed.
+            print(f"Could not create index {keys} on {collection.name}: {e}")
 
+
+def get_database():
+    """
+    Returns the MongoDB database, using the shared client.
+
+    Returns:
+        database: MongoDB database object
+    """
     # Return the database (named 'project_logs')
-    return client['project_logs']
+    return _get_client()['project_logs']
 
 
 # Admin operations
@@ -59,36 +118,80 @@ def create_admin(username, password_hash, name, email, department, role="departm
     }
 
     result = db.admins.insert_one(admin_data)
+    cached_admin.clear()  # Drop any cached "not found" for this username
+    cached_all_admins.clear()  # Show the new admin in the admin list
     return str(result.inserted_id)
 
 
-def get_admin_by_username(username):
+def get_admin_by_username(username, projection=None):
     """
     Retrieves an admin by their username.
 
     Args:
         username: The admin's username
+        projection: Optional fields to include/exclude
 
     Returns:
         dict: Admin document or None if not found
     """
     db = get_database()
-    return db.admins.find_one({"username": username})
+    return db.admins.find_one({"username": username}, projection)
+
+
+@st.cache_data(ttl=300, max_entries=1000, show_spinner=False)
+def cached_admin(username):
+    """
+    Cached version of get_admin_by_username.
+
+    Used for admin logins. Cleared when an admin is created or changes
+    password through this server process; changes made elsewhere (e.g.
+    create_super_admin.py or the MongoDB shell) show up after the TTL.
+    authenticate_admin re-checks the database before rejecting a login.
+
+    Args:
+        username: The admin's username
+
+    Returns:
+        dict: Admin document or None if not found
+    """
+    return get_admin_by_username(username)
 
 
-def get_all_admins(department=None):
+def get_all_admins(department=None, projection=None, limit=None):
     """
     Retrieves all admins, optionally filtered by department.
 
     Args:
         department: Optional department filter
+        projection: Optional fields to include/exclude (e.g. LIST_PROJECTION)
+        limit: Optional maximum number of admins to return
 
     Returns:
         list: List of admin documents
     """
     db = get_database()
     query = {"department": department} if department else {}
-    return list(db.admins.find(query))
+    cursor = db.admins.find(query, projection)
+    if limit:
+        cursor = cursor.limit(limit)
+    return list(cursor)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_all_admins(department=None):
+    """
+    Cached version of get_all_admins for the super admin list.
+
+    Password hashes are left out. Cleared automatically when an admin
+    is created.
+
+    Args:
+        department: Optional department filter
+
+    Returns:
+        list: List of admin documents
+    """
+    return get_all_admins(department=department, projection=LIST_PROJECTION)
 
 
 def update_admin_password(username, new_password_hash):
@@ -112,6 +215,7 @@ def update_admin_password(username, new_password_hash):
             }
         }
     )
+    cached_admin.clear()  # Don't serve the old hash from the cache
     return result.modified_count > 0
 
 
@@ -145,21 +249,128 @@ def create_student(username, password_hash, name, email, supervisor_email, depar
     }
 
     result = db.students.insert_one(student_data)
+    cached_student.clear()  # Drop any cached "not found" for this username
+    cached_student_public.clear()
+    cached_all_students.clear()  # Show the new student in the admin list
     return str(result.inserted_id)
 
 
-def get_student_by_username(username):
+def bulk_create_students(students, department="general"):
+    """
+    Creates many students with a single bulk insert.
+
+    One round-trip for the whole batch instead of one per student.
+    The insert is unordered, so one bad row doesn't stop the others.
+
+    Args:
+        students: List of dicts with keys username, password_hash, name,
+                  email and supervisor_email (same as create_student)
+        department: Department code/name assigned to every student
+
+    Returns:
+        tuple: (inserted_count: int, errors: list of (index, message))
+               where index is the position in `students` that failed
+    """
+    if not students:
+        return 0, []
+
+    db = get_database()
+    created_at = datetime.now()
+
+    student_docs = [
+        {
+            "username": student["username"],
+            "password": student["password_hash"],
+            "name": student["name"],
+            "email": student["email"],
+            "supervisor_email": student["supervisor_email"],
+            "department": department,
+            "created_at": created_at,
+            "must_change_password": True  # Force password change on first login
+        }
+        for student in students
+    ]
+
+    try:
+        result = db.students.insert_many(student_docs, ordered=False)
+        inserted_count, errors = len(result.inserted_ids), []
+    except BulkWriteError as e:
+        errors = [(error["index"], error["errmsg"]) for error in e.details.get("writeErrors", [])]
+        inserted_count = e.details.get("nInserted", 0)
+
+    # Drop any cached "not found" for these usernames and show them in the list
+    cached_student.clear()
+    cached_student_public.clear()
+    cached_all_students.clear()
+    return inserted_count, errors
+
+
+def get_student_by_username(username, projection=None):
     """
     Retrieves a student by their username.
 
     Args:
         username: The student's username
+        projection: Optional fields to include/exclude
 
     Returns:
         dict: Student document or None if not found
     """
     db = get_database()
-    return db.students.find_one({"username": username})
+    return db.students.find_one({"username": username}, projection)
+
+
+def get_student_public(username):
+    """
+    Retrieves a student without their login fields.
+
+    Use this wherever the password hash isn't needed (i.e. everywhere
+    except authentication and password changes).
+
+    Args:
+        username: The student's username
+
+    Returns:
+        dict: Student document (no password or must_change_password) or None
+    """
+    return get_student_by_username(username, {"password": 0, "must_change_password": 0})
+
+
+@st.cache_data(ttl=300, max_entries=1000, show_spinner=False)
+def cached_student_public(username):
+    """
+    Cached version of get_student_public, for pages that only need a
+    student's name, email or supervisor.
+
+    Password changes don't touch these fields, so only creating a student
+    clears it.
+
+    Args:
+        username: The student's username
+
+    Returns:
+        dict: Student document (no login fields) or None if not found
+    """
+    return get_student_public(username)
+
+
+@st.cache_data(ttl=300, max_entries=1000, show_spinner=False)
+def cached_student(username):
+    """
+    Cached version of get_student_by_username.
+
+    Used for logins and profile lookups. Cleared when a student is created
+    or changes password through this server process; changes made
+    elsewhere (e.g. the MongoDB shell) show up after the TTL.
+    authenticate_user re-checks the database before rejecting a login.
+
+    Args:
+        username: The student's username
+
+    Returns:
+        dict: Student document or None if not found
+    """
+    return get_student_by_username(username)
 
 
 def update_student_password(username, new_password_hash):
@@ -183,9 +394,44 @@ def update_student_password(username, new_password_hash):
             }
         }
     )
+    cached_student.clear()  # Don't serve the old hash from the cache
+    cached_all_students.clear()  # must_change_password changed
     return result.modified_count > 0
 
 
+def bulk_update_passwords(pairs, must_change_password=True):
+    """
+    Resets many students' passwords in one round-trip (e.g. by an admin).
+
+    Args:
+        pairs: Iterable of (username, new_password_hash) pairs
+        must_change_password: Whether students must pick a new password on
+                              next login (defaults to True for admin resets)
+
+    Returns:
+        int: Number of students updated
+    """
+    operations = [
+        UpdateOne(
+            {"username": username},
+            {"$set": {
+                "password": password_hash,
+                "must_change_password": must_change_password
+            }}
+        )
+        for username, password_hash in pairs
+    ]
+
+    if not operations:
+        return 0
+
+    db = get_database()
+    result = db.students.bulk_write(operations, ordered=False)
+    cached_student.clear()  # Don't serve the old hashes from the cache
+    cached_all_students.clear()  # must_change_password changed
+    return result.modified_count
+
+
 # Log operations
 def create_log(student_username, week_number, content):
     """
@@ -198,11 +444,17 @@ def create_log(student_username, week_number, content):
 
     Returns:
         str: The inserted log's ID
+
+    Raises:
+        DuplicateKeyError: If the student already has a log for this week
     """
     db = get_database()
 
-    # Get student info
-    student = get_student_by_username(student_username)
+    # Get student info (only the fields copied into the log, not the password hash)
+    student = get_student_by_username(
+        student_username,
+        {"name": 1, "email": 1, "supervisor_email": 1, "_id": 0}
+    )
     if not student:
         raise ValueError("Student not found")
 
@@ -222,18 +474,77 @@ def create_log(student_username, week_number, content):
     return str(result.inserted_id)
 
 
-def get_student_logs(student_username):
+def get_student_logs(student_username, status=None, order="DESC", limit=None):
+    """
+    Retrieves logs for a specific student, sorted by week number.
+
+    Filtering and sorting happen in MongoDB rather than in Python,
+    so only the matching documents are sent over the connection.
+
+    Args:
+        student_username: Username of the student
+        status: Optional status filter ('pending', 'approved' or 'rejected')
+        order: "DESC" for newest week first, "ASC" for oldest first
+        limit: Optional maximum number of logs to return
+
+    Returns:
+        list: List of log documents
+    """
+    db = get_database()
+    query = {"student_username": student_username}
+    if status:
+        query["verified"] = status
+
+    logs = db.logs.find(query).sort("week_number", 1 if order == "ASC" else -1)
+    if limit:
+        logs = logs.limit(limit)
+    return list(logs)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_student_logs(student_username, status=None, order="DESC"):
     """
-    Retrieves all logs for a specific student, sorted by week number.
+    Cached version of get_student_logs.
+
+    Streamlit reruns the whole page on every widget interaction, so without
+    caching each click would query the database again. Call
+    cached_student_logs.clear() after a new log is created.
 
     Args:
         student_username: Username of the student
+        status: Optional status filter
+        order: "DESC" or "ASC" by week number
 
     Returns:
         list: List of log documents
     """
+    return get_student_logs(student_username, status=status, order=order)
+
+
+def get_supervisor_logs(supervisor_email, status=None, limit=None):
+    """
+    Retrieves logs assigned to a supervisor, newest submission first.
+
+    The log content is left out, since a list only needs the summary
+    fields and content is by far the largest part of each document.
+    Use get_log_by_id to load a single log in full.
+
+    Args:
+        supervisor_email: Email of the supervisor
+        status: Optional status filter ('pending', 'approved' or 'rejected')
+        limit: Optional maximum number of logs to return
+
+    Returns:
+        list: List of log documents without their content
+    """
     db = get_database()
-    logs = db.logs.find({"student_username": student_username}).sort("week_number", -1)
+    query = {"supervisor_email": supervisor_email}
+    if status:
+        query["verified"] = status
+
+    logs = db.logs.find(query, {"content": 0}).sort("submitted_at", -1)
+    if limit:
+        logs = logs.limit(limit)
     return list(logs)
 
 
@@ -247,11 +558,24 @@ def get_log_by_id(log_id):
     Returns:
         dict: Log document or None
     """
-    from bson.objectid import ObjectId
     db = get_database()
     return db.logs.find_one({"_id": ObjectId(log_id)})
 
 
+def get_log_by_token(token):
+    """
+    Retrieves a log by its verification token.
+
+    Args:
+        token: Verification token from email link
+
+    Returns:
+        dict: Log document or None
+    """
+    db = get_database()
+    return db.logs.find_one({"verification_token": token})
+
+
 def update_log_verification_token(log_id, token):
     """
     Updates a log with its verification token.
@@ -260,7 +584,6 @@ def update_log_verification_token(log_id, token):
         log_id: The log's ID
         token: Verification token
     """
-    from bson.objectid import ObjectId
     db = get_database()
     db.logs.update_one(
         {"_id": ObjectId(log_id)},
@@ -277,18 +600,39 @@ def verify_log(token, status):
         status: 'approved' or 'rejected'
 
     Returns:
-        dict: Updated log or None if token invalid
+        dict: Updated log or None if token invalid or already used
     """
     db = get_database()
-    log = db.logs.find_one({"verification_token": token})
 
-    if log:
-        db.logs.update_one(
-            {"verification_token": token},
-            {"$set": {"verified": status}}
-        )
-        return log
-    return None
+    # Find and update in one atomic step; matching only pending logs means
+    # a second click on the link can't change the decision
+    return db.logs.find_one_and_update(
+        {"verification_token": token, "verified": "pending"},
+        {"$set": {"verified": status}},
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def verify_log_by_id(log_id, status):
+    """
+    Verifies or rejects a log from a signed verification link.
+
+    The link's signature must be checked first (see utils/signing.py);
+    this only applies the decision.
+
+    Args:
+        log_id: The log's ObjectId as string
+        status: 'approved' or 'rejected'
+
+    Returns:
+        dict: Updated log or None if not found or already verified
+    """
+    db = get_database()
+    return db.logs.find_one_and_update(
+        {"_id": ObjectId(log_id), "verified": "pending"},
+        {"$set": {"verified": status}},
+        return_document=ReturnDocument.AFTER
+    )
 
 
 # Supervisor operations
@@ -296,6 +640,9 @@ def get_or_create_supervisor(email, name=None):
     """
     Gets an existing supervisor or creates a new one.
 
+    Done as a single atomic upsert, so two requests for a new supervisor
+    can't both insert it.
+
     Args:
         email: Supervisor's email
         name: Supervisor's name (optional)
@@ -304,34 +651,88 @@ def get_or_create_supervisor(email, name=None):
         dict: Supervisor document
     """
     db = get_database()
-    supervisor = db.supervisors.find_one({"email": email})
-
-    if not supervisor:
-        supervisor_data = {
+    return db.supervisors.find_one_and_update(
+        {"email": email},
+        {"$setOnInsert": {
             "email": email,
             "name": name or email.split('@')[0],  # Use email prefix if no name
             "created_at": datetime.now()
-        }
-        db.supervisors.insert_one(supervisor_data)
-        supervisor = supervisor_data
+        }},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def bulk_create_supervisors(supervisors):
+    """
+    Creates any supervisors that don't exist yet, in one round-trip.
+
+    Existing supervisors are left untouched (same as get_or_create_supervisor).
+
+    Args:
+        supervisors: Iterable of (email, name) pairs, ideally de-duplicated
+
+    Returns:
+        int: Number of new supervisors created
+    """
+    created_at = datetime.now()
+    operations = [
+        UpdateOne(
+            {"email": email},
+            {"$setOnInsert": {
+                "email": email,
+                "name": name or email.split('@')[0],  # Use email prefix if no name
+                "created_at": created_at
+            }},
+            upsert=True
+        )
+        for email, name in supervisors
+    ]
+
+    if not operations:
+        return 0
 
-    return supervisor
+    db = get_database()
+    result = db.supervisors.bulk_write(operations, ordered=False)
+    return result.upserted_count
 
 
 # Admin operations
-def get_all_students(department=None):
+def get_all_students(department=None, projection=None, limit=None):
     """
     Retrieves all students for admin view, optionally filtered by department.
 
     Args:
         department: Optional department filter
+        projection: Optional fields to include/exclude (e.g. LIST_PROJECTION)
+        limit: Optional maximum number of students to return
 
     Returns:
         list: List of student documents
     """
     db = get_database()
     query = {"department": department} if department else {}
-    return list(db.students.find(query))
+    cursor = db.students.find(query, projection)
+    if limit:
+        cursor = cursor.limit(limit)
+    return list(cursor)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_all_students(department=None):
+    """
+    Cached version of get_all_students for the admin student list.
+
+    Password hashes are left out. Cleared automatically when students
+    are created or their passwords change.
+
+    Args:
+        department: Optional department filter
+
+    Returns:
+        list: List of student documents
+    """
+    return get_all_students(department=department, projection=LIST_PROJECTION)
 
 
 def check_existing_log(student_username, week_number):
@@ -350,3 +751,21 @@ def check_existing_log(student_username, week_number):
         "student_username": student_username,
         "week_number": week_number
     })
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def cached_existing_log(student_username, week_number):
+    """
+    Cached version of check_existing_log for rendering warnings.
+
+    Use check_existing_log directly when the answer gates a write (as the
+    Submit Log page does right before calling create_log).
+
+    Args:
+        student_username: Student's username
+        week_number: Week number to check
+
+    Returns:
+        dict: Existing log or None
+    """
+    return check_existing_log(student_username, week_number)
@@ -5,88 +5,61 @@ This module handles sending verification emails to supervisors.
 """
 
 import streamlit as st
+import html
 import smtplib
 import secrets
+import threading
+import time
+from string import Template
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from urllib.parse import urlencode
 from utils.database import update_log_verification_token
+from utils.signing import signing_enabled, sign_link_params
 
 
-def generate_verification_token():
+@st.cache_data(ttl=300, show_spinner=False)
+def _smtp_config():
     """
-    Generates a secure random token for verification links.
+    Reads the email settings from Streamlit secrets.
 
-    secrets module: Cryptographically secure random number generator.
-    Better than random module for security purposes.
+    Cached for 5 minutes so each email doesn't re-read secrets, but short
+    enough that a fixed secrets.toml is picked up without a restart.
 
     Returns:
-        str: A random 32-character hexadecimal token
+        dict: gmail_user, gmail_password and app_url (credentials may be None)
     """
-    return secrets.token_urlsafe(32)
-
+    return {
+        "gmail_user": st.secrets.get("GMAIL_USER"),
+        "gmail_password": st.secrets.get("GMAIL_APP_PASSWORD"),
+        "app_url": st.secrets.get("APP_URL", "http://localhost:8501"),
+    }
 
-def send_verification_email(log_id, student_name, student_email, supervisor_email, week_number, log_content):
-    """
-    Sends a verification email to the supervisor with approve/reject links.
 
-    How it works:
-    1. Generate a unique token
-    2. Create links with that token
-    3. Send email with both links
-    4. When supervisor clicks, token identifies which log to update
-
-    Args:
-        log_id: ID of the log to verify
-        student_name: Name of the student
-        student_email: Email of the student
-        supervisor_email: Email of the supervisor
-        week_number: Week number of the log
-        log_content: The actual log content
-
-    Returns:
-        tuple: (success: bool, message: str)
-    """
-    try:
-        # Generate verification token
-        token = generate_verification_token()
-
-        # Store token in database
-        update_log_verification_token(log_id, token)
-
-        # Get app URL from Streamlit secrets
-        app_url = st.secrets.get("APP_URL", "http://localhost:8501")
-
-        # Create verification links
-        # These will be handled by a special Streamlit page
-        approve_link = f"{app_url}/verify?token={token}&action=approved"
-        reject_link = f"{app_url}/verify?token={token}&action=rejected"
-
-        # Create email
-        subject = f"Log Verification Required - {student_name} (Week {week_number})"
-
-        # HTML email body with styled buttons
-        html_body = f"""
+# HTML email body, parsed once at import instead of rebuilt as an f-string
+# for every email. Fill it with _HTML_TEMPLATE.substitute(...).
+_HTML_TEMPLATE = Template("""
         <html>
             <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
                 <h2 style="color: #2c3e50;">Weekly Log Verification</h2>
 
                 <p>Dear Supervisor,</p>
 
-                <p><strong>{student_name}</strong> has submitted their log for <strong>Week {week_number}</strong>.</p>
+                <p><strong>${student_name}</strong> has submitted their log for <strong>Week ${week_number}</strong>.</p>
 
                 <div style="background-color: #f4f4f4; padding: 15px; border-left: 4px solid #3498db; margin: 20px 0;">
                     <h3 style="margin-top: 0;">Log Content:</h3>
-                    <p style="white-space: pre-wrap;">{log_content}</p>
+                    <p style="white-space: pre-wrap;">${log_content}</p>
                 </div>
 
-                <p><strong>Student Email:</strong> {student_email}</p>
+                <p><strong>Student Email:</strong> ${student_email}</p>
 
                 <p>Please verify this log by clicking one of the buttons below:</p>
 
                 <table cellpadding="0" cellspacing="0" border="0" style="margin: 30px 0;">
                     <tr>
                         <td style="padding-right: 10px;">
-                            <a href="{approve_link}"
+                            <a href="${approve_link}"
                                style="background-color: #27ae60;
                                       color: white;
                                       padding: 12px 30px;
@@ -98,7 +71,7 @@ def send_verification_email(log_id, student_name, student_email, supervisor_emai
                             </a>
                         </td>
                         <td>
-                            <a href="{reject_link}"
+                            <a href="${reject_link}"
                                style="background-color: #e74c3c;
                                       color: white;
                                       padding: 12px 30px;
@@ -120,53 +93,282 @@ def send_verification_email(log_id, student_name, student_email, supervisor_emai
                 </p>
             </body>
         </html>
-        """
+        """)
 
-        # Plain text version for email clients that don't support HTML
-        plain_body = f"""
+
+# Plain text email body, also parsed once (plain text needs no escaping)
+_PLAIN_TEMPLATE = Template("""
 Weekly Log Verification
 
 Dear Supervisor,
 
-{student_name} has submitted their log for Week {week_number}.
+${student_name} has submitted their log for Week ${week_number}.
 
 Log Content:
-{log_content}
+${log_content}
 
-Student Email: {student_email}
+Student Email: ${student_email}
 
 Please verify this log by clicking one of the links below:
 
-Approve: {approve_link}
-Reject: {reject_link}
+Approve: ${approve_link}
+Reject: ${reject_link}
 
 ---
 This is an automated email from the Project Logging System.
-        """
+        """)
 
-        # Create message
-        message = MIMEMultipart('alternative')
-        message['Subject'] = subject
-        message['From'] = st.secrets["GMAIL_USER"]
-        message['To'] = supervisor_email
 
-        # Attach both plain and HTML versions
-        part1 = MIMEText(plain_body, 'plain')
-        part2 = MIMEText(html_body, 'html')
-        message.attach(part1)
-        message.attach(part2)
+# An SMTP connection can only send one message at a time
+_SMTP_LOCK = threading.Lock()
+
+# Give up on a stalled SMTP socket after this many seconds instead of
+# waiting for the OS (which can take minutes) while holding _SMTP_LOCK
+SMTP_TIMEOUT_SECONDS = 30
+
+# Check a connection with NOOP before reusing it after this much idle time
+SMTP_IDLE_CHECK_SECONDS = 60
+
+# When the shared connection last sent something (guarded by _SMTP_LOCK)
+_smtp_last_used = 0.0
+
+# The connection currently handed out by _get_smtp (guarded by _SMTP_LOCK),
+# so it can be closed when it is dropped or replaced
+_smtp_server = None
+
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _get_smtp(gmail_user, gmail_password):
+    """
+    Opens a logged-in connection to Gmail's SMTP server, kept for reuse.
+
+    The TLS handshake and login are the slowest part of sending an email,
+    so they're done once instead of for every message. The connection is
+    cached per credentials, so changed secrets get a new connection.
+
+    Args:
+        gmail_user: Gmail address to log in as
+        gmail_password: Gmail app password
+
+    Returns:
+        SMTP_SSL: Connected and logged-in SMTP server
+    """
+    server = smtplib.SMTP_SSL('smtp.gmail.com', 465, timeout=SMTP_TIMEOUT_SECONDS)
+    try:
+        server.login(gmail_user, gmail_password)
+    except Exception:
+        server.close()  # Don't leave the socket open after a failed login
+        raise
+    return server
+
+
+def _close_server(server):
+    """
+    Closes an SMTP connection, politely if it is still alive.
+
+    Args:
+        server: The SMTP_SSL connection to close
+    """
+    try:
+        server.quit()
+    except OSError:  # Includes SMTPException; the connection is already broken
+        server.close()
+
+
+def _current_smtp(credentials):
+    """
+    Returns the shared SMTP connection, closing the previous one if the
+    credentials changed and a new connection replaced it.
+
+    Call with _SMTP_LOCK held.
+
+    Args:
+        credentials: (gmail_user, gmail_password) tuple
+
+    Returns:
+        SMTP_SSL: Connected and logged-in SMTP server
+    """
+    global _smtp_server
+
+    server = _get_smtp(*credentials)
+    if server is not _smtp_server:
+        if _smtp_server is not None:
+            _close_server(_smtp_server)  # Evicted from the cache, but still open
+        _smtp_server = server
+    return server
 
-        # Send email via Gmail SMTP
-        gmail_user = st.secrets.get("GMAIL_USER")
-        gmail_password = st.secrets.get("GMAIL_APP_PASSWORD")
+
+def _drop_smtp():
+    """
+    Closes the shared SMTP connection and removes it from the cache.
+
+    Call with _SMTP_LOCK held.
+    """
+    global _smtp_server
+
+    if _smtp_server is not None:
+        _close_server(_smtp_server)
+        _smtp_server = None
+    _get_smtp.clear()
+
+
+def _send_message(message):
+    """
+    Sends a message over the shared SMTP connection.
+
+    Gmail drops idle connections, so a connection that has been idle for
+    a while is checked with NOOP first. If it has gone away it is reopened
+    and the send is retried once. A timeout drops the connection without
+    retrying, since the message may already have been accepted.
+
+    Args:
+        message: The email message to send
+    """
+    global _smtp_last_used
+
+    config = _smtp_config()
+    credentials = (config["gmail_user"], config["gmail_password"])
+
+    with _SMTP_LOCK:
+        try:
+            server = _current_smtp(credentials)
+            if time.monotonic() - _smtp_last_used > SMTP_IDLE_CHECK_SECONDS:
+                server.noop()
+            server.send_message(message)
+        except smtplib.SMTPAuthenticationError:
+            # Re-read secrets on the next send, e.g. after an admin fixes them
+            _smtp_config.clear()
+            _drop_smtp()
+            raise
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            _drop_smtp()
+            _current_smtp(credentials).send_message(message)
+        except TimeoutError:
+            _drop_smtp()
+            raise
+        _smtp_last_used = time.monotonic()
+
+
+def build_verification_message(subject, sender, recipient, html_body, plain_body):
+    """
+    Builds the verification email with plain text and HTML versions.
+
+    The HTML part always contains ✓/✗, so it's declared UTF-8 up front and
+    MIMEText skips trying ASCII first. The plain part is often pure ASCII,
+    so MIMEText picks its charset (and keeps it 7bit when it can).
+
+    Args:
+        subject: Email subject
+        sender: From address
+        recipient: To address
+        html_body: HTML version of the body
+        plain_body: Plain text version of the body
+
+    Returns:
+        MIMEMultipart: The message, ready to send
+    """
+    message = MIMEMultipart('alternative')
+    message['Subject'] = subject
+    message['From'] = sender
+    message['To'] = recipient
+
+    # Attach both plain and HTML versions (clients show the last one they support)
+    message.attach(MIMEText(plain_body, 'plain'))
+    message.attach(MIMEText(html_body, 'html', 'utf-8'))
+    return message
+
+
+def generate_verification_token():
+    """
+    Generates a secure random token for verification links.
+
+    secrets module: Cryptographically secure random number generator.
+    Better than random module for security purposes.
+
+    Returns:
+        str: A random 32-character hexadecimal token
+    """
+    return secrets.token_urlsafe(32)
+
+
+def send_verification_email(log_id, student_name, student_email, supervisor_email, week_number, log_content):
+    """
+    Sends a verification email to the supervisor with approve/reject links.
+
+    How it works:
+    1. Create links signed with SECRET_KEY (log ID + action + expiry)
+    2. Send email with both links
+    3. When supervisor clicks, the Verify page checks the signature
+       and updates that log
+
+    Without a SECRET_KEY, a random token is stored on the log and used
+    in the links instead.
+
+    Args:
+        log_id: ID of the log to verify
+        student_name: Name of the student
+        student_email: Email of the student
+        supervisor_email: Email of the supervisor
+        week_number: Week number of the log
+        log_content: The actual log content
+
+    Returns:
+        tuple: (success: bool, message: str)
+    """
+    try:
+        # Get app URL and credentials from Streamlit secrets (read once)
+        config = _smtp_config()
+        app_url = config["app_url"]
+
+        # Create verification links
+        # These will be handled by a special Streamlit page
+        if signing_enabled():
+            # Signed links need nothing stored in the database
+            approve_link = f"{app_url}/verify?{urlencode(sign_link_params(log_id, 'approved'))}"
+            reject_link = f"{app_url}/verify?{urlencode(sign_link_params(log_id, 'rejected'))}"
+        else:
+            # Generate verification token and store it in database
+            token = generate_verification_token()
+            update_log_verification_token(log_id, token)
+
+            approve_link = f"{app_url}/verify?token={token}&action=approved"
+            reject_link = f"{app_url}/verify?token={token}&action=rejected"
+
+        # Create email
+        subject = f"Log Verification Required - {student_name} (Week {week_number})"
+
+        # HTML email body with styled buttons
+        # Values are escaped so log text like "<script>" can't break the markup
+        html_body = _HTML_TEMPLATE.substitute(
+            student_name=html.escape(student_name),
+            week_number=week_number,
+            log_content=html.escape(log_content),
+            student_email=html.escape(student_email),
+            approve_link=html.escape(approve_link),
+            reject_link=html.escape(reject_link)
+        )
+
+        # Plain text version for email clients that don't support HTML
+        plain_body = _PLAIN_TEMPLATE.substitute(
+            student_name=student_name,
+            week_number=week_number,
+            log_content=log_content,
+            student_email=student_email,
+            approve_link=approve_link,
+            reject_link=reject_link
+        )
+
+        gmail_user = config["gmail_user"]
+        gmail_password = config["gmail_password"]
 
         if not gmail_user or not gmail_password:
             return False, "Email credentials not configured in secrets"
 
-        # Connect to Gmail's SMTP server
-        with smtplib.SMTP_SSL('smtp.gmail.com', 465) as server:
-            server.login(gmail_user, gmail_password)
-            server.send_message(message)
+        # Create message
+        message = build_verification_message(subject, gmail_user, supervisor_email, html_body, plain_body)
+
+        # Send email via Gmail SMTP (reusing the open connection)
+        _send_message(message)
 
         return True, f"Verification email sent to {supervisor_email}"
 
@@ -188,17 +390,19 @@ def send_test_email(recipient_email):
         subject = "Test Email - Project Logging System"
         body = "This is a test email. Your email configuration is working correctly!"
 
+        config = _smtp_config()
+        gmail_user = config["gmail_user"]
+        gmail_password = config["gmail_password"]
+
+        if not gmail_user or not gmail_password:
+            return False, "Email credentials not configured in secrets"
+
         message = MIMEText(body)
         message['Subject'] = subject
-        message['From'] = st.secrets["GMAIL_USER"]
+        message['From'] = gmail_user
         message['To'] = recipient_email
 
-        gmail_user = st.secrets.get("GMAIL_USER")
-        gmail_password = st.secrets.get("GMAIL_APP_PASSWORD")
-
-        with smtplib.SMTP_SSL('smtp.gmail.com', 465) as server:
-            server.login(gmail_user, gmail_password)
-            server.send_message(message)
+        _send_message(message)
 
         return True, "Test email sent successfully!"
 
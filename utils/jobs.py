@@ -0,0 +1,55 @@
+"""
+Background job utilities.
+
+This module runs slow, non-critical work (like sending emails) on a small
+thread pool so pages can respond without waiting for it.
+"""
+
+import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
+from utils.email_sender import send_verification_email
+
+
+@st.cache_resource(show_spinner=False)
+def _get_executor():
+    """
+    Creates the shared pool for background jobs, once per server process.
+
+    Emails share one SMTP connection and are sent one at a time, so two
+    workers is enough to keep one queued behind the one being sent.
+    ThreadPoolExecutor only starts its threads when the first job is submitted.
+
+    Returns:
+        ThreadPoolExecutor: Shared executor
+    """
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="jobs")
+
+
+def submit_email(log_id, student_name, student_email, supervisor_email, week_number, log_content):
+    """
+    Sends a verification email in the background.
+
+    SMTP can take a second or two, so the page shows its success message
+    right away and checks the result on a later rerun.
+
+    Args:
+        log_id: ID of the log to verify
+        student_name: Name of the student
+        student_email: Email of the student
+        supervisor_email: Email of the supervisor
+        week_number: Week number of the log
+        log_content: The actual log content
+
+    Returns:
+        Future: Resolves to the (success: bool, message: str) tuple
+                returned by send_verification_email
+    """
+    return _get_executor().submit(
+        send_verification_email,
+        log_id=log_id,
+        student_name=student_name,
+        student_email=student_email,
+        supervisor_email=supervisor_email,
+        week_number=week_number,
+        log_content=log_content
+    )
@@ -0,0 +1,130 @@
+"""
+Signed verification links.
+
+Approve/reject links carry the log ID, the action and an expiry time,
+signed with HMAC-SHA256 using SECRET_KEY from Streamlit secrets. The
+Verify page checks the signature instead of looking up a stored token,
+so no token has to be written to the database when the email is sent.
+"""
+
+import hashlib
+import hmac
+import time
+import streamlit as st
+
+# How long a verification link stays valid (30 days)
+LINK_TTL_SECONDS = 30 * 24 * 60 * 60
+
+# Shortest SECRET_KEY accepted for signing (secrets.token_hex(32) gives 64)
+MIN_KEY_LENGTH = 32
+
+# Placeholder values shipped in secrets.toml.example and README.md. Anyone
+# can read these, so links signed with them could be forged.
+_PLACEHOLDER_KEYS = frozenset({
+    "your-random-secret-key-here",
+    "your-secret-key",
+})
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _secret_key():
+    """
+    Reads SECRET_KEY from Streamlit secrets (re-read every 5 minutes).
+
+    Placeholder or short keys are treated as not configured, so the app
+    falls back to stored random tokens instead of signing with a weak key.
+
+    Returns:
+        bytes: The key, or None if SECRET_KEY isn't usable
+    """
+    key = st.secrets.get("SECRET_KEY")
+    if not key:
+        return None
+
+    if key in _PLACEHOLDER_KEYS or len(key) < MIN_KEY_LENGTH:
+        print(
+            "SECRET_KEY is a placeholder or shorter than "
+            f"{MIN_KEY_LENGTH} characters; verification links will use "
+            "stored tokens instead of signatures."
+        )
+        return None
+
+    return key.encode('utf-8')
+
+
+def signing_enabled():
+    """
+    Checks whether signed links can be used.
+
+    Returns:
+        bool: True if SECRET_KEY is configured
+    """
+    return _secret_key() is not None
+
+
+def _signature(log_id, action, expires):
+    """
+    Computes the HMAC signature for one log/action/expiry combination.
+
+    Args:
+        log_id: The log's ID as a string
+        action: 'approved' or 'rejected'
+        expires: Expiry time as a Unix timestamp (int)
+
+    Returns:
+        str: Hex-encoded HMAC-SHA256 signature
+    """
+    message = f"{log_id}:{action}:{expires}".encode('utf-8')
+    return hmac.new(_secret_key(), message, hashlib.sha256).hexdigest()
+
+
+def sign_link_params(log_id, action):
+    """
+    Builds the query parameters for a signed verification link.
+
+    Args:
+        log_id: The log's ID as a string
+        action: 'approved' or 'rejected'
+
+    Returns:
+        dict: Query parameters (log, action, exp, sig) for the Verify page
+    """
+    expires = int(time.time()) + LINK_TTL_SECONDS
+    return {
+        "log": log_id,
+        "action": action,
+        "exp": expires,
+        "sig": _signature(log_id, action, expires)
+    }
+
+
+def check_link(log_id, action, expires, signature):
+    """
+    Checks that a verification link's signature is valid and not expired.
+
+    Args:
+        log_id: The `log` query parameter
+        action: The `action` query parameter
+        expires: The `exp` query parameter (string from the URL)
+        signature: The `sig` query parameter
+
+    Returns:
+        bool: True if the link is authentic and still valid
+    """
+    if not signing_enabled():
+        return False
+
+    try:
+        expires = int(expires)
+    except (TypeError, ValueError):
+        return False
+
+    if expires < time.time():
+        return False
+
+    # Compare as bytes: compare_digest raises TypeError for str arguments
+    # with non-ASCII characters, which a mangled link could contain.
+    # It takes the same time whatever the input, so the signature can't
+    # be guessed one character at a time.
+    expected = _signature(log_id, action, expires).encode('ascii')
+    return hmac.compare_digest(expected, str(signature).encode('utf-8'))